@@ -0,0 +1,70 @@
+"""Time the state expansions needed to solve a Takuzu instance.
+
+Compares the incremental row/column counters kept by Board against the
+previous implementation, which recounted the whole line with np.count_nonzero
+on every call to vector_count.
+
+Usage: python benchmarks/expansion.py [tests/test13.in]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from takuzu import Board, BitBoard, Takuzu
+
+
+class RecountBoard(Board):
+	"""Board that recounts a full row or column on every vector_count call."""
+
+	def copy(self):
+		board = super().copy()
+		board.__class__ = RecountBoard
+		return board
+
+	def vector_count(self, index, el, row):
+		return np.count_nonzero(self.board[index, ] == el) if row else \
+		       np.count_nonzero(self.board[:, index] == el)
+
+
+def expansion_time(board):
+	"""Solve the instance and return the number of expanded states and the
+	mean time, in ms, spent by actions and result on each expansion."""
+	problem = Takuzu(board)
+	expansions, elapsed = 0, 0.0
+
+	def expand(state):
+		nonlocal expansions, elapsed
+		start = time.perf_counter()
+		children = [problem.result(state, action)
+		            for action in problem.actions(state)]
+		elapsed += time.perf_counter() - start
+		expansions += 1
+		return children
+
+	frontier = [problem.initial]
+	while frontier:
+		state = frontier.pop()
+		if problem.goal_test(state):
+			break
+		frontier.extend(expand(state))
+
+	return expansions, elapsed / expansions * 1000
+
+
+if __name__ == "__main__":
+	path = sys.argv[1] if len(sys.argv) > 1 else \
+	       os.path.join(os.path.dirname(__file__), "..", "tests", "test13.in")
+
+	with open(path) as f:
+		sys.stdin = f
+		rows = Board.parse_instance_from_stdin().board.tolist()
+
+	print("Board,Expansions,Expansion [ms]")
+	for name, cls in (("recount", RecountBoard), ("counters", Board),
+	                  ("bitboard", BitBoard)):
+		print("{},{},{:.3f}".format(name, *expansion_time(cls(rows))))
@@ -0,0 +1,52 @@
+"""Count the nodes expanded and generated by each search algorithm.
+
+Prints three tables: the nodes expanded and generated by each algorithm, in
+the format of benchmarks/expandidos.csv and benchmarks/gerados.csv, and the
+nodes expanded by depth-first search with each branching strategy.
+
+Usage: python benchmarks/nodes.py [tests/*.in]
+"""
+
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from search import InstrumentedProblem
+from takuzu import Board, Takuzu, BRANCHINGS, SEARCHES
+
+ALGORITHMS = {"BFS": "bfs", "DFS": "dfs", "Greedy": "greedy", "AStar": "astar"}
+
+
+def count_nodes(path, search, branching="last"):
+	"""Solve the instance in path and return the expanded and generated nodes."""
+	with open(path) as f:
+		sys.stdin = f
+		board = Board.parse_instance_from_stdin()
+
+	problem = InstrumentedProblem(Takuzu(board, branching))
+	SEARCHES[search](problem)
+
+	return problem.succs, problem.states
+
+
+def print_table(header, paths, results):
+	print("Teste," + ",".join(header))
+	for path in paths:
+		test = os.path.splitext(os.path.basename(path))[0]
+		print(test + "," + ",".join(str(r) for r in results[path]))
+
+
+if __name__ == "__main__":
+	paths = sys.argv[1:] or sorted(
+	    glob.glob(os.path.join(os.path.dirname(__file__), "..", "tests", "test[0-9]*.in")))
+
+	results = {path: [count_nodes(path, s) for s in ALGORITHMS.values()]
+	           for path in paths}
+	print_table(ALGORITHMS, paths, {p: [r[0] for r in results[p]] for p in paths})
+	print_table(ALGORITHMS, paths, {p: [r[1] for r in results[p]] for p in paths})
+
+	results = {path: [count_nodes(path, "dfs", b)[0] for b in BRANCHINGS]
+	           for path in paths}
+	print_table(BRANCHINGS, paths, results)
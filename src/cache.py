@@ -0,0 +1,132 @@
+"""
+Persistent cache of Takuzu solutions, in an SQLite database.
+
+Rotating, reflecting or complementing (swapping 0 and 1) a puzzle does the
+same to its solutions, so the cache is keyed by a canonical form of the
+puzzle among its 16 transforms, given by Board.canonical. The solution is
+stored for the canonical puzzle and mapped back to each puzzle that hits it. The least
+recently used entries are evicted beyond the capacity of the cache.
+"""
+
+import hashlib
+import sqlite3
+import contextlib
+import numpy as np
+
+CAPACITY = 100000
+
+CACHES = {}
+
+
+def square(data: bytes):
+	"""Return a board serialized as Board.serialize as a square np.uint8 array."""
+	numbers = np.frombuffer(data, dtype=np.uint8)
+	dimension = int(np.sqrt(len(numbers)))
+	return numbers.reshape(dimension, dimension)
+
+
+def transform(numbers, t: int):
+	"""Return the t-th transform (0 to 15) of a square array of numbers: the
+	transpose if t & 4, then rotated t & 3 quarter turns, then complemented
+	if t & 8."""
+	numbers = np.rot90(numbers.T if t & 4 else numbers, t & 3)
+	return np.where(numbers < 2, 1 - numbers, numbers) if t & 8 else numbers
+
+
+def inverse(numbers, t: int):
+	"""Undo transform(numbers, t)."""
+	numbers = np.where(numbers < 2, 1 - numbers, numbers) if t & 8 else numbers
+	numbers = np.rot90(numbers, -(t & 3))
+	return numbers.T if t & 4 else numbers
+
+
+class SolutionCache:
+	"""Solutions of canonical puzzles, with the number of hits and misses of
+	every process using the database."""
+
+	def __init__(self, path, capacity=CAPACITY):
+		self.capacity = capacity
+		self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+		                        "(key BLOB PRIMARY KEY, solution BLOB, used INTEGER)")
+		self.connection.execute("CREATE INDEX IF NOT EXISTS lru ON solutions (used)")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS counters "
+		                        "(name TEXT PRIMARY KEY, value INTEGER)")
+		self.connection.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), "
+		                        "('clock', 0), ('entries', 0)")
+
+	@contextlib.contextmanager
+	def transaction(self):
+		"""Run the statements of a with block in a single transaction."""
+		self.connection.execute("BEGIN IMMEDIATE")
+		try:
+			yield
+		except BaseException:
+			self.connection.execute("ROLLBACK")
+			raise
+		self.connection.execute("COMMIT")
+
+	def tick(self, name, increment=1):
+		"""Increment a counter and return its new value."""
+		return self.connection.execute("UPDATE counters SET value = value + ? WHERE name = ? "
+		                               "RETURNING value", (increment, name)).fetchone()[0]
+
+	def key(self, board):
+		"""Return the key of a board and the transform to its canonical form."""
+		(data, t) = board.canonical()
+		return (hashlib.sha256(board.dimension.to_bytes(2, "little") + data).digest(), t)
+
+	def get(self, board):
+		"""Look up a board. Return (True, solution) on a hit, solution being
+		serialized as Board.serialize or None if the board has no solution,
+		and (False, None) on a miss."""
+		(key, t) = self.key(board)
+
+		with self.transaction():
+			row = self.connection.execute("SELECT solution FROM solutions WHERE key = ?",
+			                              (key,)).fetchone()
+			if row is None:
+				self.tick("misses")
+				return (False, None)
+
+			self.tick("hits")
+			self.connection.execute("UPDATE solutions SET used = ? WHERE key = ?",
+			                        (self.tick("clock"), key))
+
+		if row[0] is None:
+			return (True, None)
+
+		return (True, inverse(square(row[0]), t).tobytes())
+
+	def put(self, board, solution):
+		"""Store the solution of a board, serialized as Board.serialize (None
+		if it has none), evicting the least recently used entries beyond the
+		capacity."""
+		(key, t) = self.key(board)
+		if solution is not None:
+			solution = transform(square(solution), t).tobytes()
+
+		with self.transaction():
+			inserted = self.connection.execute("INSERT OR IGNORE INTO solutions VALUES (?, ?, ?)",
+			                                   (key, solution, self.tick("clock"))).rowcount
+			if inserted:
+				excess = self.tick("entries") - self.capacity
+				if excess > 0:
+					self.connection.execute("DELETE FROM solutions WHERE key IN (SELECT key FROM "
+					                        "solutions ORDER BY used LIMIT ?)", (excess,))
+					self.tick("entries", -excess)
+
+	def stats(self):
+		"""Return the number of hits, misses and entries of the cache."""
+		counters = dict(self.connection.execute("SELECT name, value FROM counters"))
+		return (counters["hits"], counters["misses"], counters["entries"])
+
+
+def open_cache(path, capacity=CAPACITY):
+	"""Return the SolutionCache of path, opened once per process."""
+	if path not in CACHES:
+		CACHES[path] = SolutionCache(path, capacity)
+
+	return CACHES[path]
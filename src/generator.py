@@ -0,0 +1,146 @@
+# Grupo 41:
+# 99079 Guilherme Pascoal
+# 99115 Pedro Lobo
+
+import sys
+import time
+import random
+import argparse
+import sat
+import patterns
+from search import InstrumentedProblem, depth_first_tree_search
+from takuzu import BOARDS, Takuzu, solutions
+
+
+def random_branching(generator: random.Random):
+	"""Return a branching strategy that splits a random free position, trying
+	its numbers in random order."""
+
+	def branch(board):
+		free = board.free_positions()
+		if not free:
+			return []
+
+		(i, j) = generator.choice(free)
+		actions = [((i, j, 0),), ((i, j, 1),)]
+		generator.shuffle(actions)
+		return actions
+
+	return branch
+
+
+def random_grid(board_class, dimension: int, generator: random.Random):
+	"""Return a random solved board of the given dimension."""
+	board = board_class([[2] * dimension for _ in range(dimension)])
+	return next(solutions(board, random_branching(generator)))
+
+
+def has_other_solution(board, row: int, col: int, number: int):
+	"""Return True if board has a solution with number on the given free
+	position."""
+	board = board.copy()
+	board.place_number(row, col, number)
+	# Most constrained position branching finds (or refutes) the solution
+	# with about a third of the nodes of the default strategy, and the line
+	# solver refutes most candidates without branching, on the dimensions
+	# whose table of valid lines can be built.
+	propagation = "lines" if patterns.fits(board.dimension) else "local"
+	return next(solutions(board, "mrv", limit=1, propagation=propagation), None) is not None
+
+
+def remove_clues(solution, generator: random.Random):
+	"""Remove numbers from a solved board, in random order, while the board
+	keeps a unique solution. Returns the resulting minimal puzzle.
+
+	The puzzle is edited in place rather than rebuilt. Before a removal the
+	puzzle has a unique solution, so any other solution after removing a
+	number must differ from it on that position: uniqueness only needs a
+	search for a solution with the opposite number there, which propagation
+	usually refutes at once."""
+	puzzle = solution.copy()
+	positions = [(i, j) for i in range(puzzle.dimension) for j in range(puzzle.dimension)]
+	generator.shuffle(positions)
+
+	for (i, j) in positions:
+		number = int(puzzle.get_number(i, j))
+		puzzle.remove_number(i, j)
+		if has_other_solution(puzzle, i, j, 1 - number):
+			puzzle.place_number(i, j, number)
+
+	return puzzle
+
+
+def is_unique(puzzle, solution):
+	"""Return True if solution is the only solution of puzzle, checked apart
+	from the search by the SAT solver: the CNF of puzzle, with a clause
+	excluding solution, must have no model."""
+	cnf = sat.encode(puzzle)
+	n = puzzle.dimension
+	cnf.add([-(i * n + j + 1) if solution.get_number(i, j) == 1 else i * n + j + 1
+	         for i in range(n) for j in range(n)])
+	return sat.CDCL(cnf).solve() is None
+
+
+def difficulty(puzzle):
+	"""Return the number of nodes expanded by depth_first_tree_search to solve
+	puzzle."""
+	problem = InstrumentedProblem(Takuzu(puzzle.copy()))
+	depth_first_tree_search(problem)
+	return problem.succs
+
+
+def generate(dimension: int, count: int, seed=None, min_difficulty=0,
+             board_class=BOARDS["bitboard"]):
+	"""Yield count puzzles of the given dimension, each with a unique
+	solution and no number that can be removed without losing uniqueness,
+	along with their solution and difficulty. Puzzles expanding fewer than
+	min_difficulty nodes are discarded."""
+	generator = random.Random(seed)
+
+	while count > 0:
+		solution = random_grid(board_class, dimension, generator)
+		puzzle = remove_clues(solution, generator)
+		nodes = difficulty(puzzle)
+
+		if nodes >= min_difficulty:
+			yield (puzzle, solution, nodes)
+			count -= 1
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+	    description="Generate Takuzu instances with a unique solution.")
+	parser.add_argument("dimension", type=int, help="board dimension")
+	parser.add_argument("-n", "--count", type=int, default=1,
+	                    help="number of instances (default: 1)")
+	parser.add_argument("--seed", type=int, help="random seed")
+	parser.add_argument("--difficulty", type=int, default=0,
+	                    help="minimum number of nodes expanded by DFS to solve an instance")
+	parser.add_argument("--solutions", metavar="PATH",
+	                    help="also write the solutions, in the format of the .out files")
+	parser.add_argument("-b", "--board", choices=BOARDS, default="bitboard",
+	                    help="board representation (default: bitboard)")
+	parser.add_argument("--check", action="store_true",
+	                    help="check with the SAT solver that every solution is unique")
+	args = parser.parse_args()
+
+	out = open(args.solutions, "w") if args.solutions else None
+	start = time.perf_counter()
+
+	for (k, (puzzle, solution, nodes)) in enumerate(
+	    generate(args.dimension, args.count, args.seed, args.difficulty,
+	             BOARDS[args.board]), 1):
+		if args.check and not is_unique(puzzle, solution):
+			sys.exit("Error: puzzle {} has more than one solution.".format(k))
+
+		print(puzzle.dimension)
+		print(puzzle, flush=True)
+		if out:
+			print(solution, file=out)
+
+		elapsed = time.perf_counter() - start
+		print("{}: {} nodes, {:.2f} puzzles/s".format(k, nodes, k / elapsed),
+		      file=sys.stderr)
+
+	if out:
+		out.close()
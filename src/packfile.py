@@ -0,0 +1,176 @@
+"""
+Binary container of Takuzu boards, with two bits per position.
+
+The file starts with a header (magic, version, number of boards and offset
+of the index), followed by the boards and then by the index: the offset of
+every board, as little-endian uint64. A board is its dimension, as a
+little-endian uint16, followed by its numbers (0, 1 or 2 for a free
+position) packed four per byte, first position in the high bits, in
+row-major order.
+
+Usage: python src/packfile.py pack [--solutions] OUTPUT [FILE...]
+       python src/packfile.py unpack [--solutions] INPUT
+"""
+
+import sys
+import mmap
+import struct
+import argparse
+import numpy as np
+
+MAGIC = b"TKZ\0"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxIQ")
+DIMENSION = struct.Struct("<H")
+SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+
+def pack_numbers(numbers):
+	"""Return the numbers of a square array packed two bits each."""
+	numbers = np.asarray(numbers, dtype=np.uint8).ravel()
+	numbers = np.concatenate((numbers, np.zeros(-len(numbers) % 4, dtype=np.uint8)))
+	return np.bitwise_or.reduce(numbers.reshape(-1, 4) << SHIFTS, axis=1).astype(np.uint8)
+
+
+def unpack_numbers(packed, dimension: int):
+	"""Return a square np.uint8 array from the output of pack_numbers."""
+	numbers = (np.asarray(packed, dtype=np.uint8)[:, None] >> SHIFTS) & 3
+	return numbers.ravel()[:dimension * dimension].reshape(dimension, dimension)
+
+
+def is_packfile(path):
+	"""Return True if path is a file starting with the magic of a PackFile."""
+	try:
+		with open(path, "rb") as f:
+			return f.read(len(MAGIC)) == MAGIC
+	except OSError:
+		return False
+
+
+class PackWriter:
+	"""Writes boards to a new PackFile."""
+
+	def __init__(self, path):
+		self.file = open(path, "wb")
+		self.offsets = []
+		self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def append(self, numbers):
+		"""Write a board, given as a square array of numbers."""
+		numbers = np.asarray(numbers, dtype=np.uint8)
+		self.offsets.append(self.file.tell())
+		self.file.write(DIMENSION.pack(len(numbers)))
+		self.file.write(pack_numbers(numbers).tobytes())
+
+	def close(self):
+		"""Write the index and the header, and close the file."""
+		if self.file.closed:
+			return
+
+		index = self.file.tell()
+		self.file.write(np.array(self.offsets, dtype="<u8").tobytes())
+		self.file.seek(0)
+		self.file.write(HEADER.pack(MAGIC, VERSION, len(self.offsets), index))
+		self.file.close()
+
+
+class PackFile:
+	"""Memory-mapped reader of the boards of a PackFile."""
+
+	def __init__(self, path):
+		with open(path, "rb") as f:
+			self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+		(magic, version, count, index) = HEADER.unpack_from(self.map)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError("{} is not a version {} Takuzu pack file.".format(path, VERSION))
+
+		self.offsets = np.frombuffer(self.map, dtype="<u8", count=count, offset=index)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def __getitem__(self, k):
+		"""Return the numbers of the k-th board, as a square np.uint8 array."""
+		return unpack_numbers(*self.packed(k))
+
+	def __iter__(self):
+		return (self[k] for k in range(len(self)))
+
+	def packed(self, k):
+		"""Return the packed numbers of the k-th board, a view on the file,
+		and its dimension."""
+		offset = int(self.offsets[k])
+		(dimension,) = DIMENSION.unpack_from(self.map, offset)
+		size = (dimension * dimension + 3) // 4
+		return (np.frombuffer(self.map, dtype=np.uint8, count=size,
+		                      offset=offset + DIMENSION.size), dimension)
+
+	def close(self):
+		"""Close the map, unless views returned by packed still use it."""
+		del self.offsets
+		try:
+			self.map.close()
+		except BufferError:
+			pass
+
+
+def read_solution(file):
+	"""Read the rows of a solved board, in the output format, until an empty
+	line or the end of file. Returns None if there are no rows."""
+	rows = []
+
+	for line in file:
+		if not line.isspace():
+			rows.append([int(x) for x in line.split("\t")])
+		elif rows:
+			break
+
+	return rows or None
+
+
+if __name__ == "__main__":
+	from takuzu import Board, format_numbers
+
+	parser = argparse.ArgumentParser(description="Convert Takuzu boards between the text "
+	                                             "format and the binary pack format.")
+	commands = parser.add_subparsers(dest="command", required=True)
+	pack = commands.add_parser("pack", help="write the boards of text files (default: stdin) "
+	                                        "to a pack file")
+	pack.add_argument("output")
+	pack.add_argument("files", nargs="*")
+	pack.add_argument("--solutions", action="store_true",
+	                  help="read solved boards in the output format, separated by empty lines")
+	unpack = commands.add_parser("unpack", help="print the boards of a pack file as text")
+	unpack.add_argument("input")
+	unpack.add_argument("--solutions", action="store_true",
+	                    help="print boards in the output format, without dimensions")
+	args = parser.parse_args()
+
+	if args.command == "pack":
+		files = [open(path) for path in args.files] or [sys.stdin]
+		with PackWriter(args.output) as writer:
+			for file in files:
+				read = read_solution if args.solutions else Board.read_rows
+				rows = read(file)
+				while rows is not None:
+					writer.append(rows)
+					rows = read(file)
+	else:
+		with PackFile(args.input) as boards:
+			for numbers in boards:
+				if not args.solutions:
+					print(len(numbers))
+				print(format_numbers(numbers))
@@ -0,0 +1,173 @@
+"""
+Tables of the valid lines of Takuzu, per dimension.
+
+A valid line is balanced and has no three equal adjacent numbers. Lines are
+stored as np.uint64 bitmasks, where bit k is 1 when position k holds a 1,
+together with an index of packed bitsets over the table: bit p of index[k]
+is 1 when line p has a 1 on position k. Tables are built once, saved as .npy
+files in the cache directory and memory-mapped on later runs.
+
+Usage: python src/patterns.py DIMENSION...
+"""
+
+import os
+import sys
+import tempfile
+import functools
+import numpy as np
+
+CACHE_DIR = os.environ.get("TAKUZU_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "takuzu"))
+
+# Most lines in a table: dimension 32 has 2.2 million, taking 26 MB with their
+# index, and dimension 33 already has 6.5 million.
+MAX_LINES = 1 << 22
+
+TABLES = {}
+
+
+class TableTooLarge(ValueError):
+	"""Raised when a dimension has too many valid lines to build its table."""
+
+
+@functools.lru_cache(maxsize=None)
+def count_lines(dimension: int):
+	"""Return the number of valid lines of the given dimension, counted by
+	their ones, zeros, last number and length of its final run, without
+	building them."""
+	half = (dimension + 1) // 2
+	counts = {(0, 0, 2, 0): 1}
+
+	for _ in range(dimension):
+		following = {}
+		for ((ones, zeros, last, run), count) in counts.items():
+			for number in (0, 1):
+				key = (ones + number, zeros + 1 - number, number, run + 1 if number == last else 1)
+				if key[0] <= half and key[1] <= half and key[3] <= 2:
+					following[key] = following.get(key, 0) + count
+		counts = following
+
+	return sum(counts.values())
+
+
+def fits(dimension: int):
+	"""Return True if the table of the given dimension can be built."""
+	return dimension <= 64 and count_lines(dimension) <= MAX_LINES
+
+
+def line_patterns(dimension: int):
+	"""Return every valid line of the given dimension, sorted, as an
+	np.uint64 array. Raises TableTooLarge beyond MAX_LINES lines."""
+	if not fits(dimension):
+		raise TableTooLarge("Dimension {} has more valid lines than a table holds "
+		                    "({} at most).".format(dimension, MAX_LINES))
+
+	half = (dimension + 1) // 2
+	patterns = np.zeros(1, dtype=np.uint64)
+	ones = np.zeros(1, dtype=np.int64)
+
+	for k in range(dimension):
+		bit = np.uint64(1 << k)
+		patterns = np.concatenate((patterns, patterns | bit))
+		ones = np.concatenate((ones, ones + 1))
+		keep = (ones <= half) & (k + 1 - ones <= half)
+
+		if k >= 2:
+			last = (patterns >> np.uint64(k - 2)) & np.uint64(7)
+			keep &= (last != 0) & (last != 7)
+
+		patterns = patterns[keep]
+		ones = ones[keep]
+
+	return np.sort(patterns)
+
+
+def line_mask(line):
+	"""Return the ones and filled bitmasks of a list of numbers."""
+	ones = sum(1 << k for (k, number) in enumerate(line) if number == 1)
+	filled = sum(1 << k for (k, number) in enumerate(line) if number != 2)
+	return (ones, filled)
+
+
+def position_index(patterns, dimension: int):
+	"""Return the packed bitsets of the lines with a 1 on each position, as
+	an np.uint8 array of shape (dimension, ceil(len(patterns) / 8))."""
+	return np.packbits([(patterns >> np.uint64(k)) & np.uint64(1) == 1
+	                    for k in range(dimension)], axis=1)
+
+
+def save(path, array):
+	"""Write array to path as a .npy file, atomically, so that concurrent
+	processes never read a partial file."""
+	(fd, temporary) = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npy")
+	try:
+		with os.fdopen(fd, "wb") as f:
+			np.save(f, array)
+		os.replace(temporary, path)
+	except BaseException:
+		os.unlink(temporary)
+		raise
+
+
+class PatternTable:
+	"""The valid lines of a dimension and their per-position index."""
+
+	def __init__(self, dimension: int, cache_dir=CACHE_DIR):
+		self.dimension = dimension
+		lines_path = os.path.join(cache_dir, "lines-{}.npy".format(dimension))
+		index_path = os.path.join(cache_dir, "index-{}.npy".format(dimension))
+
+		try:
+			self.patterns = np.load(lines_path, mmap_mode="r")
+			self.index = np.load(index_path, mmap_mode="r")
+		except (OSError, ValueError):
+			self.patterns = line_patterns(dimension)
+			self.index = position_index(self.patterns, dimension)
+			try:
+				os.makedirs(cache_dir, exist_ok=True)
+				save(lines_path, self.patterns)
+				save(index_path, self.index)
+			except OSError:
+				pass
+
+		# Bitset of every line, without the padding bits of the last byte.
+		self.all = np.packbits(np.ones(len(self.patterns), dtype=bool))
+
+	def __len__(self):
+		return len(self.patterns)
+
+	def matching_bitset(self, ones: int, filled: int):
+		"""Return the packed bitset of the lines with a 1 on the positions set
+		in both ones and filled, and a 0 on the other positions of filled."""
+		bitset = self.all.copy()
+
+		for k in range(self.dimension):
+			if filled >> k & 1:
+				if ones >> k & 1:
+					bitset &= self.index[k]
+				else:
+					bitset &= ~self.index[k]
+
+		return bitset
+
+	def matching(self, ones: int, filled: int):
+		"""Return the lines matching the numbers given by ones and filled, as
+		an np.uint64 array."""
+		bitset = self.matching_bitset(ones, filled)
+		return self.patterns[np.flatnonzero(np.unpackbits(bitset)[:len(self.patterns)])]
+
+
+def table(dimension: int):
+	"""Return the PatternTable of a dimension, loaded once per process."""
+	if dimension not in TABLES:
+		TABLES[dimension] = PatternTable(dimension)
+
+	return TABLES[dimension]
+
+
+if __name__ == "__main__":
+	for dimension in map(int, sys.argv[1:]):
+		try:
+			print("{}: {} lines".format(dimension, len(table(dimension))))
+		except TableTooLarge as error:
+			sys.exit("Error: {}".format(error))
@@ -0,0 +1,134 @@
+"""
+Row-pattern search for Takuzu.
+
+Every row of a solved board is one of the valid lines of its dimension:
+balanced and without three equal adjacent numbers. Lines are stored as
+bitmasks, where bit k is 1 when position k holds a 1. The search picks
+whole rows among the valid lines that match each row's numbers, looked up
+in the tables of patterns.py, and narrows the valid lines left to each
+column with bitwise operations on the same tables.
+"""
+
+import numpy as np
+import patterns
+
+
+class RowSearch:
+	"""Depth-first search over whole rows, placing next the row with the
+	fewest candidate lines left.
+
+	The candidates of a row are the valid lines matching its numbers. Each
+	column keeps the packed bitset of the valid lines matching its numbers
+	and the placed rows, narrowed by one index of the table per placement.
+	After each placement, the candidates of the other rows are filtered: a
+	line no row took yet, holding on every position a number that some
+	candidate line of that column holds on that row. A column with no
+	candidate left, or with the same single candidate as another column,
+	ends the branch, so columns are valid and different once every row is
+	placed."""
+
+	def __init__(self, board):
+		self.dimension = board.dimension
+		self.mask = (1 << self.dimension) - 1
+		self.table = patterns.table(self.dimension)
+		self.nodes = 0
+
+		self.candidates = {}
+		for i in range(self.dimension):
+			(ones, filled) = patterns.line_mask([board.get_number(i, j) for j in range(self.dimension)])
+			self.candidates[i] = self.table.matching(ones, filled).tolist()
+
+		self.columns = []
+		for j in range(self.dimension):
+			(ones, filled) = patterns.line_mask([board.get_number(i, j) for i in range(self.dimension)])
+			self.columns.append(self.table.matching_bitset(ones, filled))
+
+	def place(self, columns, i, line):
+		"""Return the bitsets of the columns once row i takes line."""
+		index = self.table.index[i]
+		return [bitset & index if line >> j & 1 else bitset & ~index
+		        for (j, bitset) in enumerate(columns)]
+
+	def allowed(self, columns):
+		"""Return, for every row, the bitmask of the positions that can take a
+		1 and the bitmask of those that can take a 0, given the candidates of
+		the columns. Returns None if a column has no candidate, or the same
+		single candidate as another column."""
+		ones = [0] * self.dimension
+		zeros = [0] * self.dimension
+		forced = set()
+
+		for (j, bitset) in enumerate(columns):
+			lines = self.table.patterns[np.flatnonzero(np.unpackbits(bitset)[:len(self.table)])]
+			if len(lines) == 0:
+				return None
+			if len(lines) == 1:
+				if int(lines[0]) in forced:
+					return None
+				forced.add(int(lines[0]))
+
+			sometimes = int(np.bitwise_or.reduce(lines))
+			always = int(np.bitwise_and.reduce(lines))
+			for i in range(self.dimension):
+				if sometimes >> i & 1:
+					ones[i] |= 1 << j
+				if not always >> i & 1:
+					zeros[i] |= 1 << j
+
+		return (ones, zeros)
+
+	def filter(self, candidates, rows, allowed):
+		"""Return the candidates of the rows not placed yet that agree with
+		the allowed numbers of every position and that no row took, or None
+		if a row has none left."""
+		(ones, zeros) = allowed
+		used = set(rows.values())
+		remaining = {}
+
+		for (k, lines) in candidates.items():
+			if k not in rows:
+				remaining[k] = [line for line in lines
+				                if not (line & ~ones[k] or ~line & self.mask & ~zeros[k] or line in used)]
+				if not remaining[k]:
+					return None
+
+		return remaining
+
+	def solve(self):
+		"""Return the rows of a solution as bitmasks, or None."""
+		rows = {}
+
+		def search(candidates, columns):
+			self.nodes += 1
+			if not candidates:
+				return True
+
+			i = min(candidates, key=lambda k: len(candidates[k]))
+			for line in candidates[i]:
+				rows[i] = line
+				narrowed = self.place(columns, i, line)
+				allowed = self.allowed(narrowed)
+				remaining = self.filter(candidates, rows, allowed) if allowed is not None else None
+				if remaining is not None and search(remaining, narrowed):
+					return True
+				del rows[i]
+
+			return False
+
+		allowed = self.allowed(self.columns)
+		candidates = self.filter(self.candidates, rows, allowed) if allowed is not None else None
+		if candidates is not None and search(candidates, self.columns):
+			return [rows[i] for i in range(self.dimension)]
+
+		return None
+
+
+def solve_board(board):
+	"""Return the rows of a solution of board found by RowSearch, or None if
+	it has no solution."""
+	rows = RowSearch(board).solve()
+
+	if rows is None:
+		return None
+
+	return [[row >> j & 1 for j in range(board.dimension)] for row in rows]
@@ -0,0 +1,342 @@
+"""
+CNF encoding of Takuzu and a conflict-driven clause learning (CDCL) solver.
+
+Variable i * N + j + 1 is true when position (i, j) holds a 1. Clauses are
+lists of non-zero integers, as in DIMACS, where -v is the negation of v.
+"""
+
+import heapq
+
+
+class CNF:
+	"""A formula in conjunctive normal form."""
+
+	def __init__(self):
+		self.variables = 0
+		self.clauses = []
+
+	def new_variable(self):
+		"""Return a new variable."""
+		self.variables += 1
+		return self.variables
+
+	def add(self, clause):
+		"""Add a clause."""
+		self.clauses.append(list(clause))
+
+	def at_most(self, literals, k):
+		"""Add clauses stating that at most k of the literals are true, with
+		the sequential counter encoding: s[i][j] is true when at least j + 1
+		of the first i + 1 literals are true."""
+		n = len(literals)
+		if k >= n:
+			return
+		elif k == 0:
+			for x in literals:
+				self.add([-x])
+			return
+
+		s = [[self.new_variable() for _ in range(k)] for _ in range(n - 1)]
+
+		self.add([-literals[0], s[0][0]])
+		for j in range(1, k):
+			self.add([-s[0][j]])
+
+		for i in range(1, n - 1):
+			self.add([-literals[i], s[i][0]])
+			self.add([-s[i - 1][0], s[i][0]])
+			for j in range(1, k):
+				self.add([-literals[i], -s[i - 1][j - 1], s[i][j]])
+				self.add([-s[i - 1][j], s[i][j]])
+			self.add([-literals[i], -s[i - 1][k - 1]])
+
+		self.add([-literals[n - 1], -s[n - 2][k - 1]])
+
+	def differ(self, first, second):
+		"""Add clauses stating that two lists of variables differ on at least
+		one position: d is true only if first[k] and second[k] differ."""
+		differences = []
+
+		for (a, b) in zip(first, second):
+			d = self.new_variable()
+			self.add([-d, a, b])
+			self.add([-d, -a, -b])
+			differences.append(d)
+
+		self.add(differences)
+
+	def to_dimacs(self):
+		"""Return the formula in the DIMACS CNF format."""
+		lines = ["p cnf {} {}".format(self.variables, len(self.clauses))]
+		lines.extend(" ".join(map(str, clause)) + " 0" for clause in self.clauses)
+		return "\n".join(lines) + "\n"
+
+
+def encode(board):
+	"""Return the CNF of the rules of Takuzu and the numbers of board."""
+	n = board.dimension
+	cnf = CNF()
+	cnf.variables = n * n
+	rows = [[i * n + j + 1 for j in range(n)] for i in range(n)]
+	cols = [list(col) for col in zip(*rows)]
+	half = (n + 1) // 2
+
+	for i in range(n):
+		for j in range(n):
+			number = board.get_number(i, j)
+			if number != 2:
+				cnf.add([rows[i][j] if number == 1 else -rows[i][j]])
+
+	for line in rows + cols:
+		for k in range(n - 2):
+			cnf.add(line[k:k + 3])
+			cnf.add([-x for x in line[k:k + 3]])
+
+		cnf.at_most(line, half)
+		cnf.at_most([-x for x in line], half)
+
+	for lines in (rows, cols):
+		for a in range(n):
+			for b in range(a + 1, n):
+				cnf.differ(lines[a], lines[b])
+
+	return cnf
+
+
+def decode(model, dimension):
+	"""Return the rows of the board given by a model of encode."""
+	return [[int(model[i * dimension + j + 1]) for j in range(dimension)]
+	        for i in range(dimension)]
+
+
+def luby(i):
+	"""Return the i-th element (from 1) of the Luby sequence 1 1 2 1 1 2 4..."""
+	k = 1
+	while (1 << k) - 1 < i:
+		k += 1
+
+	while (1 << k) - 1 != i:
+		i -= (1 << (k - 1)) - 1
+		k = 1
+		while (1 << k) - 1 < i:
+			k += 1
+
+	return 1 << (k - 1)
+
+
+class CDCL:
+	"""Conflict-driven clause learning SAT solver, with two watched literals,
+	first-UIP clause learning, VSIDS-like variable activities, phase saving
+	and restarts following the Luby sequence.
+
+	Internally literal 2 * v stands for v and 2 * v + 1 for -v, and values
+	holds 1, -1 or 0 for every literal that is true, false or unassigned."""
+
+	restart_interval = 64
+	decay = 0.95
+
+	def __init__(self, cnf: CNF):
+		n = cnf.variables
+		self.variables = n
+		self.values = [0] * (2 * n + 2)
+		self.level = [0] * (n + 1)
+		self.reason = [None] * (n + 1)
+		self.phase = [False] * (n + 1)
+		self.activity = [0.0] * (n + 1)
+		self.increment = 1.0
+		self.heap = [(0.0, v) for v in range(1, n + 1)]
+		self.watches = [[] for _ in range(2 * n + 2)]
+		self.trail = []
+		self.trail_lim = []
+		self.qhead = 0
+		self.ok = True
+
+		units = []
+		for clause in cnf.clauses:
+			literals = sorted(set(2 * abs(x) + (x < 0) for x in clause))
+			if any(literals[k] ^ 1 == literals[k + 1] for k in range(len(literals) - 1)):
+				continue
+			elif len(literals) == 0:
+				self.ok = False
+			elif len(literals) == 1:
+				units.append(literals[0])
+			else:
+				self.watch(literals)
+
+		for literal in units:
+			if self.values[literal] == -1:
+				self.ok = False
+			elif self.values[literal] == 0:
+				self.enqueue(literal, None)
+
+	def watch(self, clause):
+		"""Watch the first two literals of a clause."""
+		self.watches[clause[0]].append(clause)
+		self.watches[clause[1]].append(clause)
+
+	def enqueue(self, literal, reason):
+		"""Make literal true, implied by the reason clause (None for decisions)."""
+		v = literal >> 1
+		self.values[literal] = 1
+		self.values[literal ^ 1] = -1
+		self.level[v] = len(self.trail_lim)
+		self.reason[v] = reason
+		self.trail.append(literal)
+
+	def propagate(self):
+		"""Propagate the literals of the trail not yet propagated. Returns the
+		conflicting clause, or None."""
+		values = self.values
+
+		while self.qhead < len(self.trail):
+			false = self.trail[self.qhead] ^ 1
+			self.qhead += 1
+			watchers = self.watches[false]
+			self.watches[false] = kept = []
+
+			for (k, clause) in enumerate(watchers):
+				if clause[0] == false:
+					(clause[0], clause[1]) = (clause[1], false)
+
+				if values[clause[0]] == 1:
+					kept.append(clause)
+					continue
+
+				for m in range(2, len(clause)):
+					if values[clause[m]] != -1:
+						(clause[1], clause[m]) = (clause[m], false)
+						self.watches[clause[1]].append(clause)
+						break
+				else:
+					kept.append(clause)
+					if values[clause[0]] == -1:
+						kept.extend(watchers[k + 1:])
+						return clause
+					self.enqueue(clause[0], clause)
+
+		return None
+
+	def bump(self, v):
+		"""Increase the activity of variable v."""
+		self.activity[v] += self.increment
+		if self.activity[v] > 1e100:
+			self.activity = [a * 1e-100 for a in self.activity]
+			self.increment *= 1e-100
+		heapq.heappush(self.heap, (-self.activity[v], v))
+
+	def analyze(self, conflict):
+		"""Return the first-UIP clause learnt from a conflict, with the
+		asserting literal first and a literal of the backjump level second,
+		and the level to backjump to."""
+		seen = set()
+		learnt = [None]
+		level = len(self.trail_lim)
+		counter = 0
+		index = len(self.trail) - 1
+		literals = conflict
+
+		while True:
+			for q in literals:
+				v = q >> 1
+				if v not in seen and self.level[v] > 0:
+					seen.add(v)
+					self.bump(v)
+					if self.level[v] == level:
+						counter += 1
+					else:
+						learnt.append(q)
+
+			while self.trail[index] >> 1 not in seen:
+				index -= 1
+			p = self.trail[index]
+			index -= 1
+			counter -= 1
+
+			if counter == 0:
+				break
+
+			literals = self.reason[p >> 1][1:]
+
+		learnt[0] = p ^ 1
+		self.increment /= self.decay
+
+		if len(learnt) == 1:
+			return (learnt, 0)
+
+		k = max(range(1, len(learnt)), key=lambda k: self.level[learnt[k] >> 1])
+		(learnt[1], learnt[k]) = (learnt[k], learnt[1])
+		return (learnt, self.level[learnt[1] >> 1])
+
+	def backtrack(self, level):
+		"""Undo every assignment above the given decision level."""
+		if len(self.trail_lim) <= level:
+			return
+
+		for literal in self.trail[self.trail_lim[level]:]:
+			v = literal >> 1
+			self.values[literal] = self.values[literal ^ 1] = 0
+			self.reason[v] = None
+			self.phase[v] = literal & 1 == 0
+			heapq.heappush(self.heap, (-self.activity[v], v))
+
+		del self.trail[self.trail_lim[level]:]
+		del self.trail_lim[level:]
+		self.qhead = len(self.trail)
+
+	def decide(self):
+		"""Return the unassigned variable with the highest activity, or None."""
+		if len(self.heap) > 4 * self.variables:
+			self.heap = [(-self.activity[v], v) for v in range(1, self.variables + 1)
+			             if self.values[2 * v] == 0]
+			heapq.heapify(self.heap)
+
+		while self.heap:
+			(_, v) = heapq.heappop(self.heap)
+			if self.values[2 * v] == 0:
+				return v
+
+		return None
+
+	def solve(self):
+		"""Return a model, a list with the value of every variable (index 0
+		unused), or None if the formula is unsatisfiable."""
+		if not self.ok:
+			return None
+
+		conflicts = 0
+		restarts = 1
+		limit = self.restart_interval * luby(restarts)
+
+		while True:
+			conflict = self.propagate()
+
+			if conflict is not None:
+				if not self.trail_lim:
+					return None
+
+				(learnt, level) = self.analyze(conflict)
+				self.backtrack(level)
+				if len(learnt) > 1:
+					self.watch(learnt)
+				self.enqueue(learnt[0], learnt if len(learnt) > 1 else None)
+
+				conflicts += 1
+				if conflicts >= limit:
+					restarts += 1
+					limit += self.restart_interval * luby(restarts)
+					self.backtrack(0)
+			else:
+				v = self.decide()
+				if v is None:
+					return [False] + [self.values[2 * v] == 1
+					                  for v in range(1, self.variables + 1)]
+
+				self.trail_lim.append(len(self.trail))
+				self.enqueue(2 * v + (not self.phase[v]), None)
+
+
+def solve_board(board):
+	"""Return the rows of the solution of board found by CDCL on its CNF
+	encoding, or None if it has no solution."""
+	model = CDCL(encode(board)).solve()
+	return decode(model, board.dimension) if model is not None else None
@@ -288,8 +288,7 @@ def best_first_graph_search(problem, f, display=False):
 				frontier.append(child)
 			elif child in frontier:
 				if f(child) < frontier[child]:
-					del frontier[child]
-					frontier.append(child)
+					frontier.decrease_key(child)
 	return None
 
 
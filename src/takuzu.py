@@ -2,12 +2,34 @@
 # 99079 Guilherme Pascoal
 # 99115 Pedro Lobo
 
+import io
+import os
 import sys
+import time
+import signal
+import socket
+import random
+import argparse
+import threading
+import socketserver
+import multiprocessing
+from queue import Empty
+from collections import deque
 import numpy as np
+import rows
+import sat
+import patterns
+from cache import CAPACITY, open_cache
+from packfile import PackFile, is_packfile
 from search import (
     Problem,
     Node,
+    astar_search,
+    breadth_first_graph_search,
+    breadth_first_tree_search,
+    depth_first_graph_search,
     depth_first_tree_search,
+    greedy_search,
 )
 
 
@@ -20,38 +42,198 @@ class TakuzuState:
 		TakuzuState.state_id += 1
 
 	def __lt__(self, other):
-		return len(self.board.free_positions()) < len(other.board.free_positions())
+		return self.board.n_free_positions < other.board.n_free_positions
+
+	def __eq__(self, other):
+		return isinstance(other, TakuzuState) and self.board == other.board
+
+	def __hash__(self):
+		return hash(self.board)
 
 	def get_board(self):
 		return self.board.copy()
 
 
+ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(dimension: int):
+	"""Return the random keys of every (row, col, number) of a board with the
+	given dimension; the key of a placement is at index 2 * (row * dimension
+	+ col) + number. Keys are seeded by the dimension, so they are the same
+	in every process."""
+	if dimension not in ZOBRIST_KEYS:
+		generator = random.Random(dimension)
+		ZOBRIST_KEYS[dimension] = [generator.getrandbits(64)
+		                           for _ in range(2 * dimension * dimension)]
+
+	return ZOBRIST_KEYS[dimension]
+
+
+# Bytes read at a time by parse_stream.
+CHUNK_SIZE = 1 << 20
+
+
+def parse_stream(file, chunk_size=CHUNK_SIZE):
+	"""Yield the numbers of every instance of a binary file in the input
+	format, as square np.uint8 arrays. The file is read chunk_size bytes at a
+	time, each chunk split into tokens with array operations, so memory only
+	holds a chunk and the instance being filled. Raises ValueError on a
+	dimension below 1, a number other than 0, 1 and 2 or a truncated instance."""
+	rest = b""
+	numbers = None
+
+	while True:
+		data = file.read(chunk_size)
+		text = rest + data
+		if data:
+			# Keep the last token, which may continue in the next chunk.
+			cut = max(text.rfind(b) for b in (b" ", b"\t", b"\n", b"\r")) + 1
+			(text, rest) = (text[:cut], text[cut:])
+
+		chars = np.frombuffer(text, dtype=np.uint8)
+		space = np.concatenate(([True], chars <= ord(" "), [True]))
+		starts = np.flatnonzero(space[:-2] & ~space[1:-1])
+		ends = np.flatnonzero(~space[1:-1] & space[2:]) + 1
+		k = 0
+
+		while k < len(starts):
+			if numbers is None:
+				dimension = int(text[starts[k]:ends[k]])
+				if dimension < 1:
+					raise ValueError("Invalid dimension {}.".format(dimension))
+				numbers = np.empty(dimension * dimension, dtype=np.uint8)
+				filled = 0
+				k += 1
+				continue
+
+			count = min(len(numbers) - filled, len(starts) - k)
+			values = chars[starts[k:k + count]] - np.uint8(ord("0"))
+			if (ends[k:k + count] - starts[k:k + count] != 1).any() or (values > 2).any():
+				raise ValueError("Numbers must be 0, 1 or 2.")
+
+			numbers[filled:filled + count] = values
+			filled += count
+			k += count
+
+			if filled == len(numbers):
+				yield numbers.reshape(dimension, dimension)
+				numbers = None
+
+		if not data:
+			break
+
+	if numbers is not None:
+		raise ValueError("Truncated instance.")
+
+
+def parse_instances(data: str):
+	"""Yield the numbers of every instance in a string in the input format,
+	as parse_stream does."""
+	yield from parse_stream(io.BytesIO(data.encode()))
+
+
+def format_numbers(numbers):
+	"""Return a square array of numbers in the output format: a line per row,
+	its numbers separated by tabs. The text is built as a single array."""
+	dimension = len(numbers)
+	text = np.full((dimension, 2 * dimension), ord("\t"), dtype=np.uint8)
+	text[:, 0::2] = np.asarray(numbers) + ord("0")
+	text[:, -1] = ord("\n")
+	return text.tobytes()[:-1].decode("ascii")
+
+
+def line_bitmasks(numbers):
+	"""Return the ones and filled bitmasks of every row and of every column of
+	a square array of numbers, as lists of ints where bit k is position k."""
+
+	def masks(lines):
+		packed = np.packbits(lines, axis=1, bitorder="little")
+		return [int.from_bytes(line.tobytes(), "little") for line in packed]
+
+	return (masks(numbers == 1), masks(numbers != 2), masks(numbers.T == 1), masks(numbers.T != 2))
+
+
 class Board:
 	"""Internal representation of Takuzu board."""
 
 	def __init__(self, board):
-		self.board = np.array(board)
+		self.board = np.array(board, dtype=np.int64)
 		self.dimension = len(self.board)
-		self.n_free_positions = np.count_nonzero(self.board == 2)
+
+		# Occurrences of 0, 1 and 2 in every row, followed by every column,
+		# stored flat: the count of el in line k is at counts[3 * k + el].
+		self.counts = []
+		for axis in (1, 0):
+			for vector in zip(*(np.count_nonzero(self.board == el, axis=axis)
+			                    for el in (0, 1, 2))):
+				self.counts.extend(int(c) for c in vector)
+
+		self.initialize(self.board)
+
+	def initialize(self, numbers):
+		"""Set the state that place_number keeps up to date to what placing
+		every number of a new board would give, computed on the whole array
+		of numbers at once."""
+		n = self.dimension
+		half = (n + 1) // 2
+		filled = numbers != 2
+		self.n_free_positions = n * n - int(np.count_nonzero(filled))
+
+		# Number of broken rules: each triple, each number beyond half of a
+		# line, and each pair of equal complete lines. lines holds how many
+		# times each complete row and column appears.
+		self.conflicts = 0
+		for lines in (numbers, numbers.T):
+			triples = (lines[:, :-2] != 2) & (lines[:, :-2] == lines[:, 1:-1]) & \
+			          (lines[:, 1:-1] == lines[:, 2:])
+			self.conflicts += int(np.count_nonzero(triples))
+			for el in (0, 1):
+				self.conflicts += int(np.maximum(np.count_nonzero(lines == el, axis=1) - half, 0).sum())
+
+		self.lines = ({}, {})
+		for (row, complete) in ((True, filled.all(axis=1)), (False, filled.all(axis=0))):
+			lines = self.lines[0 if row else 1]
+			for index in np.flatnonzero(complete):
+				key = self.line_key(int(index), row)
+				self.conflicts += lines.get(key, 0)
+				lines[key] = lines.get(key, 0) + 1
+
+		# Zobrist hash: the xor of the keys of every placed number.
+		self.keys = zobrist_keys(n)
+		self.zobrist = 0
+		flat = numbers.ravel()
+		for k in np.flatnonzero(flat != 2).tolist():
+			self.zobrist ^= self.keys[2 * k + int(flat[k])]
+
+		# Lines still to be examined by propagate, numbered like counts.
+		self.dirty = set(range(2 * n))
 
 	def __str__(self):
 		"""Board representation."""
-		string = ""
-
-		for i in range(self.dimension):
-			for j in range(self.dimension):
-				string += str(self.get_number(i, j))
-				if j != self.dimension - 1:
-					string += "\t"
+		return format_numbers(self.board)
 
-			if i != self.dimension - 1:
-				string += "\n"
+	def __eq__(self, other):
+		return isinstance(other, Board) and self.zobrist == other.zobrist and \
+		       np.array_equal(self.board, other.board)
 
-		return string
+	def __hash__(self):
+		return self.zobrist
 
 	def copy(self):
 		"""Return copy of Board instance."""
-		return Board(self.board)
+		board = Board.__new__(Board)
+		board.board = self.board.copy()
+		board.dimension = self.dimension
+		board.n_free_positions = self.n_free_positions
+		board.counts = self.counts.copy()
+		board.conflicts = self.conflicts
+		board.lines = (self.lines[0].copy(), self.lines[1].copy())
+		board.dirty = self.dirty.copy()
+		board.keys = self.keys
+		board.zobrist = self.zobrist
+
+		return board
 
 	def get_number(self, row: int, col: int) -> int:
 		"""Return value in given position."""
@@ -61,6 +243,83 @@ class Board:
 		"""Place number on board instance."""
 		self.board[row, col] = number
 		self.n_free_positions -= 1
+		self.zobrist ^= self.keys[2 * (row * self.dimension + col) + number]
+
+		for line in (row, self.dimension + col):
+			self.counts[3 * line + 2] -= 1
+			self.counts[3 * line + number] += 1
+
+		self.update_conflicts(row, col, 1)
+		self.mark_dirty(row, col)
+
+	def update_conflicts(self, row: int, col: int, sign: int):
+		"""Add (sign 1, after placing) or remove (sign -1, before removing)
+		the broken rules involving the number on the given position."""
+		number = int(self.get_number(row, col))
+		half = (self.dimension + 1) // 2
+		conflicts = 0
+
+		for (index, k, row_line) in ((row, col, True), (col, row, False)):
+			if self.vector_count(index, number, row_line) > half:
+				conflicts += 1
+
+			conflicts += self.count_triples(index, k, row_line)
+
+			if self.vector_count(index, 2, row_line) == 0:
+				lines = self.lines[0 if row_line else 1]
+				key = self.line_key(index, row_line)
+				if sign > 0:
+					conflicts += lines.get(key, 0)
+					lines[key] = lines.get(key, 0) + 1
+				else:
+					lines[key] -= 1
+					conflicts += lines[key]
+					if lines[key] == 0:
+						del lines[key]
+
+		self.conflicts += sign * conflicts
+
+	def count_triples(self, index, k, row):
+		"""Count the three equal adjacent numbers of a row or column that
+		include its position k, reading only positions k - 2 to k + 2."""
+		window = slice(max(k - 2, 0), k + 3)
+		line = (self.board[index, window] if row else self.board[window, index]).tolist()
+		count = 0
+
+		for s in range(len(line) - 2):
+			if line[s] == line[s + 1] == line[s + 2] != 2:
+				count += 1
+
+		return count
+
+	def line_key(self, index, row):
+		"""Return a hashable representation of a complete row or column."""
+		return self.board[index].tobytes() if row else self.board[:, index].tobytes()
+
+	def mark_dirty(self, row: int, col: int):
+		"""Queue the lines that may have new forced numbers after a placement
+		on the given position: its row and column and, when one of them gets
+		completed, the parallel lines that can now be matched against it."""
+		self.dirty.add(row)
+		self.dirty.add(self.dimension + col)
+
+		for (index, row_line) in ((row, True), (col, False)):
+			if self.vector_count(index, 2, row_line) == 0:
+				offset = 0 if row_line else self.dimension
+				self.dirty.update(offset + other for other in range(self.dimension)
+				                  if self.vector_count(other, 2, row_line) == 2)
+
+	def remove_number(self, row: int, col: int):
+		"""Clear given position, undoing place_number."""
+		number = self.board[row, col]
+		self.update_conflicts(row, col, -1)
+		self.board[row, col] = 2
+		self.n_free_positions += 1
+		self.zobrist ^= self.keys[2 * (row * self.dimension + col) + number]
+
+		for line in (row, self.dimension + col):
+			self.counts[3 * line + number] -= 1
+			self.counts[3 * line + 2] += 1
 
 	def adjacent_vertical_numbers(self, row: int, col: int) -> (int, int):
 		"""Return values under and above the given position."""
@@ -85,10 +344,135 @@ class Board:
 
 		return True
 
+	def get_line(self, index, row):
+		"""Return the values of a row or column."""
+		return [self.get_number(index, k) if row else self.get_number(k, index)
+		        for k in range(self.dimension)]
+
+	def legal_numbers(self, row: int, col: int):
+		"""Return the numbers that can be placed on a free position without
+		breaking the adjacency and equality rules."""
+		adjacent_h = self.adjacent_horizontal_numbers(row, col)
+		adjacent_v = self.adjacent_vertical_numbers(row, col)
+		pairs = [adjacent_h, adjacent_v]
+
+		if col > 1:
+			pairs.append((self.get_number(row, col - 1), self.get_number(row, col - 2)))
+		if col < self.dimension - 2:
+			pairs.append((self.get_number(row, col + 1), self.get_number(row, col + 2)))
+		if row > 1:
+			pairs.append((self.get_number(row - 1, col), self.get_number(row - 2, col)))
+		if row < self.dimension - 2:
+			pairs.append((self.get_number(row + 1, col), self.get_number(row + 2, col)))
+
+		numbers = [0, 1]
+
+		for (first, sec) in pairs:
+			if first == sec and first in numbers:
+				numbers.remove(first)
+
+		for number in numbers.copy():
+			if self.vector_count(row, number, True) >= self.dimension / 2 or \
+			   self.vector_count(col, number, False) >= self.dimension / 2:
+				numbers.remove(number)
+
+		return numbers
+
+	def propagate_line(self, index, row, placements):
+		"""Place every number forced in a row or column, appending each
+		placement to placements. Return False if a free position has no
+		legal number."""
+		for k in range(self.dimension):
+			(i, j) = (index, k) if row else (k, index)
+			if self.get_number(i, j) == 2:
+				numbers = self.legal_numbers(i, j)
+				if not numbers:
+					return False
+				elif len(numbers) == 1:
+					self.place_number(i, j, numbers[0])
+					placements.append((i, j, numbers[0]))
+
+		# A line missing two numbers that can only take a 0 and a 1 (so of
+		# even dimension) and matches a complete line on every filled position
+		# must take the opposite numbers of that line. Otherwise the blanks may
+		# take other numbers, and only the completion equal to that line,
+		# counted as a conflict, is ruled out.
+		half = (self.dimension + 1) // 2
+		if self.vector_count(index, 2, row) == 2 and \
+		   self.vector_count(index, 0, row) + 2 > half and self.vector_count(index, 1, row) + 2 > half:
+			line = self.get_line(index, row)
+			for other in range(self.dimension):
+				if other == index or self.vector_count(other, 2, row) != 0:
+					continue
+
+				complete = self.get_line(other, row)
+				if all(a == b for (a, b) in zip(line, complete) if a != 2):
+					for k in range(self.dimension):
+						if line[k] == 2:
+							(i, j) = (index, k) if row else (k, index)
+							self.place_number(i, j, 1 - complete[k])
+							placements.append((i, j, 1 - complete[k]))
+					break
+
+		return True
+
+	def line_masks(self, index, row):
+		"""Return the ones and filled bitmasks of a row or column."""
+		return patterns.line_mask(self.get_line(index, row))
+
+	def solve_line(self, index, row, placements):
+		"""Place every number on which all the valid lines matching a row or
+		column agree, appending each placement to placements. Return False if
+		no valid line matches it."""
+		(ones, filled) = self.line_masks(index, row)
+		if filled == (1 << self.dimension) - 1:
+			return True
+
+		candidates = patterns.table(self.dimension).matching(ones, filled)
+		if len(candidates) == 0:
+			return False
+
+		# Positions holding a 1 in every candidate, and a 1 in some candidate.
+		always = int(np.bitwise_and.reduce(candidates))
+		sometimes = int(np.bitwise_or.reduce(candidates))
+
+		for k in range(self.dimension):
+			if not filled >> k & 1 and (always >> k & 1 or not sometimes >> k & 1):
+				(i, j) = (index, k) if row else (k, index)
+				number = always >> k & 1
+				self.place_number(i, j, number)
+				placements.append((i, j, number))
+
+		return True
+
+	def propagate(self, placements, lines=False):
+		"""Place every forced number until a fixpoint is reached, appending
+		each placement to placements. Only the lines queued by place_number
+		since the last call are examined. With lines, each line also takes the
+		numbers forced by the valid lines that match it (see solve_line).
+		Return False, stopping early, as soon as the board breaks a rule or a
+		free position has no legal number."""
+		while self.dirty:
+			if self.conflicts:
+				return False
+
+			line = self.dirty.pop()
+			(index, row) = (line, True) if line < self.dimension else \
+			               (line - self.dimension, False)
+
+			consistent = self.propagate_line(index, row, placements)
+			if consistent and lines and not self.conflicts:
+				consistent = self.solve_line(index, row, placements)
+
+			if not consistent:
+				return False
+
+		return self.conflicts == 0
+
 	def vector_count(self, index, el, row):
 		"""Count the number of occurrences of an element in a row or column."""
-		return np.count_nonzero(self.board[index, ] == el) if row else \
-		       np.count_nonzero(self.board[:, index] == el)
+		line = index if row else self.dimension + index
+		return self.counts[3 * line + el]
 
 	def free_positions(self):
 		"""Return coordinates of free position."""
@@ -98,24 +482,85 @@ class Board:
 	def number_free_positions(self):
 		return self.n_free_positions
 
-	@staticmethod
-	def parse_instance_from_stdin():
+	@classmethod
+	def parse_instance_from_stdin(cls):
 		"""Reads input from stdin and returns a new Board instance."""
-		dimension = int(input())
-		board = []
+		return cls.parse_instance(sys.stdin)
+
+	@classmethod
+	def parse_instance(cls, file):
+		"""Reads the next instance from file and returns a new Board instance,
+		or None if there are no more instances."""
+		board = Board.read_rows(file)
+		return cls(board) if board is not None else None
+
+	@staticmethod
+	def read_rows(file):
+		"""Reads the next instance from file and returns its rows, or None if
+		there are no more instances."""
+		line = file.readline()
+		while line.isspace():
+			line = file.readline()
+
+		if not line:
+			return None
+
+		dimension = int(line)
+		rows = "".join(file.readline() for _ in range(dimension))
+		return np.fromstring(rows, dtype=np.int64, sep=" ").reshape(dimension, dimension)
+
+	def serialize(self) -> bytes:
+		"""Return the board as one byte per position, in row-major order."""
+		return self.board.astype(np.uint8).tobytes()
 
-		while dimension > 0:
-			board.append([int(x) for x in sys.stdin.readline().split("\t")])
-			dimension -= 1
+	def bitmasks(self):
+		"""Return the ones and filled bitmasks of every row and of every
+		column, as kept by BitBoard."""
+		return line_bitmasks(self.board)
 
-		return Board(board)
+	def canonical(self):
+		"""Return the canonical form of the board under rotations, reflections
+		and swapping 0 and 1, and the index t of the transform giving it: the
+		transpose if t & 4, then t & 3 counterclockwise quarter turns, then
+		0 and 1 swapped if t & 8 (see cache.transform). The canonical form
+		packs the filled and ones bitmasks of every row of the transform with
+		the smallest list of masks; each transform only reorders, bit-reverses
+		or xors the masks of the rows and columns."""
+		n = self.dimension
+		width = (n + 7) // 8
+		(row_ones, row_filled, col_ones, col_filled) = self.bitmasks()
+
+		def reverse(mask):
+			return int(format(mask, "0{}b".format(n))[::-1], 2)
+
+		rows = list(zip(row_filled, row_ones))
+		cols = list(zip(col_filled, col_ones))
+		reversed_rows = [(reverse(f), reverse(o)) for (f, o) in rows]
+		reversed_cols = [(reverse(f), reverse(o)) for (f, o) in cols]
+
+		forms = []
+		for (t, lines) in enumerate((rows, cols[::-1], reversed_rows[::-1], reversed_cols,
+		                             cols, rows[::-1], reversed_cols[::-1], reversed_rows)):
+			forms.append((lines, t))
+			forms.append(([(f, o ^ f) for (f, o) in lines], t + 8))
+
+		(lines, t) = min(forms)
+		return (b"".join(f.to_bytes(width, "little") + o.to_bytes(width, "little")
+		                 for (f, o) in lines), t)
+
+	@classmethod
+	def deserialize(cls, data: bytes):
+		"""Return a new instance from the output of serialize."""
+		numbers = np.frombuffer(data, dtype=np.uint8)
+		dimension = int(np.sqrt(len(numbers)))
+		return cls(numbers.reshape(dimension, dimension).tolist())
 
 	def check_resolved_board(self):
 		"""Check if board is resolved."""
 
 		def is_full(self):
 			"""Check if board in completely filled."""
-			return np.count_nonzero(self.board == 2) == 0
+			return self.n_free_positions == 0
 
 		def equality_rule(self):
 			"""Check if specified row or column has an equal amount of 0 and 1,
@@ -154,94 +599,878 @@ class Board:
 		       equality_rule(self) and adjacency_rule(self)
 
 
-class Takuzu(Problem):
+class BitBoard(Board):
+	"""Takuzu board stored as a pair of bitmasks (ones and filled) for every
+	row and every column. Bit j of a row mask is column j, and bit i of a
+	column mask is row i."""
 
-	def __init__(self, board: Board):
-		"""Constructor specifies initial state."""
-		self.initial = TakuzuState(board)
+	def __init__(self, board):
+		numbers = np.array(board, dtype=np.int64)
+		self.dimension = len(numbers)
+		self.mask = (1 << self.dimension) - 1
+		(self.row_ones, self.row_filled, self.col_ones, self.col_filled) = line_bitmasks(numbers)
+		self.initialize(numbers)
 
-	def actions(self, state: TakuzuState):
-		"""Return a collection of actions which can be executed from the given state."""
+	def copy(self):
+		"""Return copy of BitBoard instance."""
+		board = BitBoard.__new__(BitBoard)
+		board.dimension = self.dimension
+		board.mask = self.mask
+		board.row_ones = self.row_ones.copy()
+		board.row_filled = self.row_filled.copy()
+		board.col_ones = self.col_ones.copy()
+		board.col_filled = self.col_filled.copy()
+		board.n_free_positions = self.n_free_positions
+		board.conflicts = self.conflicts
+		board.lines = (self.lines[0].copy(), self.lines[1].copy())
+		board.dirty = self.dirty.copy()
+		board.keys = self.keys
+		board.zobrist = self.zobrist
 
-		def infer_number(board, row, col):
-			adjacent_h = board.adjacent_horizontal_numbers(i, j)
-			adjacent_v = board.adjacent_vertical_numbers(i, j)
+		return board
 
-			if adjacent_h.count(0) == 2 or adjacent_v.count(0) == 2:
-				return 1
-			elif adjacent_h.count(1) == 2 or adjacent_v.count(1) == 2:
-				return 0
+	def __eq__(self, other):
+		return isinstance(other, BitBoard) and self.zobrist == other.zobrist and \
+		       self.row_ones == other.row_ones and self.row_filled == other.row_filled
 
-			if board.vector_count(row, 0, True) >= board.dimension / 2 or \
-			   board.vector_count(col, 0, False) >= board.dimension / 2:
-				return 1
-			elif board.vector_count(row, 1, True) >= board.dimension / 2 or \
-			     board.vector_count(col, 1, False) >= board.dimension / 2:
-				return 0
+	__hash__ = Board.__hash__
 
-			return None
+	def line_masks(self, index, row):
+		"""Return the ones and filled bitmasks of a row or column."""
+		return (self.row_ones[index], self.row_filled[index]) if row else \
+		       (self.col_ones[index], self.col_filled[index])
 
-		board = state.board
+	def get_number(self, row: int, col: int) -> int:
+		"""Return value in given position."""
+		if not self.row_filled[row] >> col & 1:
+			return 2
+
+		return self.row_ones[row] >> col & 1
+
+	def place_number(self, row: int, col: int, number: int):
+		"""Place number on board instance."""
+		self.row_filled[row] |= 1 << col
+		self.col_filled[col] |= 1 << row
+
+		if number == 1:
+			self.row_ones[row] |= 1 << col
+			self.col_ones[col] |= 1 << row
+
+		self.n_free_positions -= 1
+		self.zobrist ^= self.keys[2 * (row * self.dimension + col) + number]
+		self.update_conflicts(row, col, 1)
+		self.mark_dirty(row, col)
+
+	def remove_number(self, row: int, col: int):
+		"""Clear given position, undoing place_number."""
+		number = self.get_number(row, col)
+		self.update_conflicts(row, col, -1)
+		self.zobrist ^= self.keys[2 * (row * self.dimension + col) + number]
+		self.row_filled[row] &= ~(1 << col)
+		self.col_filled[col] &= ~(1 << row)
+		self.row_ones[row] &= ~(1 << col)
+		self.col_ones[col] &= ~(1 << row)
+		self.n_free_positions += 1
+
+	def count_triples(self, index, k, row):
+		"""Count the three equal adjacent numbers of a row or column that
+		include its position k, with shifts and masks of its bitmasks."""
+		(ones, filled) = self.line_masks(index, row)
+		count = 0
+
+		for start in range(max(k - 2, 0), min(k, self.dimension - 3) + 1):
+			if filled >> start & 7 == 7 and ones >> start & 7 in (0, 7):
+				count += 1
+
+		return count
+
+	def line_key(self, index, row):
+		"""Return a hashable representation of a complete row or column."""
+		return self.row_ones[index] if row else self.col_ones[index]
+
+	def bitmasks(self):
+		"""Return the ones and filled bitmasks of every row and of every column."""
+		return (self.row_ones, self.row_filled, self.col_ones, self.col_filled)
+
+	def __str__(self):
+		"""Board representation."""
+		numbers = np.frombuffer(self.serialize(), dtype=np.uint8)
+		return format_numbers(numbers.reshape(self.dimension, self.dimension))
+
+	def serialize(self) -> bytes:
+		"""Return the board as one byte per position, in row-major order."""
+		width = (self.dimension + 7) // 8
+
+		def bits(masks):
+			packed = np.frombuffer(b"".join(mask.to_bytes(width, "little") for mask in masks),
+			                       dtype=np.uint8).reshape(self.dimension, width)
+			return np.unpackbits(packed, axis=1, bitorder="little")[:, :self.dimension]
+
+		return np.where(bits(self.row_filled), bits(self.row_ones), 2).astype(np.uint8).tobytes()
 
-		for i in range(board.dimension - 1, -1, -1):
-			for j in range(board.dimension - 1, -1, -1):
-				if board.get_number(i, j) == 0:
-					adjacent_h = board.adjacent_horizontal_numbers(i, j)
-					adjacent_v = board.adjacent_vertical_numbers(i, j)
-
-					if adjacent_h == (2, 0):
-						return [(i, j - 1, 1)]
-					elif adjacent_h == (0, 2):
-						return [(i, j + 1, 1)]
-					elif adjacent_v == (2, 0):
-						return [(i + 1, j, 1)]
-					elif adjacent_v == (0, 2):
-						return [(i - 1, j, 1)]
-
-				elif board.get_number(i, j) == 1:
-					adjacent_h = board.adjacent_horizontal_numbers(i, j)
-					adjacent_v = board.adjacent_vertical_numbers(i, j)
-
-					if adjacent_h == (2, 1):
-						return [(i, j - 1, 0)]
-					elif adjacent_h == (1, 2):
-						return [(i, j + 1, 0)]
-					elif adjacent_v == (2, 1):
-						return [(i + 1, j, 0)]
-					elif adjacent_v == (1, 2):
-						return [(i - 1, j, 0)]
-
-				elif board.get_number(i, j) == 2:
-					number = infer_number(board, i, j)
-					if number != None:
-						return [(i, j, number)]
-
-		for i in range(board.dimension - 1, -1, -1):
-			for j in range(board.dimension - 1, -1, -1):
-				if board.get_number(i, j) == 2:
-					return [(i, j, 0), (i, j, 1)]
+	def vector_count(self, index, el, row):
+		"""Count the number of occurrences of an element in a row or column."""
+		ones = self.row_ones[index] if row else self.col_ones[index]
+		filled = self.row_filled[index] if row else self.col_filled[index]
+
+		if el == 1:
+			return ones.bit_count()
+		elif el == 0:
+			return (filled & ~ones).bit_count()
 
+		return self.dimension - filled.bit_count()
+
+	def free_positions(self):
+		"""Return coordinates of free position."""
+		return [(i, j) for i in range(self.dimension)
+		        for j in range(self.dimension)
+		        if not self.row_filled[i] >> j & 1]
+
+	def check_resolved_board(self):
+		"""Check if board is resolved."""
+
+		def has_triple(vector):
+			return vector & (vector >> 1) & (vector >> 2) != 0
+
+		if self.n_free_positions != 0:
+			return False
+
+		if len(set(self.row_ones)) != self.dimension or \
+		   len(set(self.col_ones)) != self.dimension:
+			return False
+
+		half = (self.dimension + 1) // 2
+		for ones in self.row_ones + self.col_ones:
+			zeros = ~ones & self.mask
+			if ones.bit_count() > half or zeros.bit_count() > half or \
+			   has_triple(ones) or has_triple(zeros):
+				return False
+
+		return True
+
+
+BOARDS = {"array": Board, "bitboard": BitBoard}
+
+
+# ______________________________________________________________________________
+# Branching strategies
+# Each strategy returns the actions that split a board with no forced numbers,
+# from the least to the most preferred value: depth_first_tree_search tries
+# the last action first.
+
+
+def last_free_position(board: Board):
+	"""Branch on the last free position in row-major order."""
+	for i in range(board.dimension - 1, -1, -1):
+		for j in range(board.dimension - 1, -1, -1):
+			if board.get_number(i, j) == 2:
+				return [((i, j, 0),), ((i, j, 1),)]
+
+	return []
+
+
+def most_constrained_position(board: Board):
+	"""Branch on the free position whose row and column have the fewest
+	free positions left."""
+	free = board.free_positions()
+	if not free:
 		return []
 
+	(i, j) = min(free, key=lambda position: board.vector_count(position[0], 2, True) +
+	             board.vector_count(position[1], 2, False))
+
+	return [((i, j, 0),), ((i, j, 1),)]
+
+
+def most_unique_value(board: Board):
+	"""Branch on the most constrained position, preferring the number that
+	leaves its row and column matching the fewest complete lines, as each
+	match is a completion ruled out by the uniqueness rule."""
+	actions = most_constrained_position(board)
+
+	if actions:
+		((i, j, _),) = actions[0]
+
+		def matches(number):
+			count = 0
+			for (index, row, k) in ((i, True, j), (j, False, i)):
+				line = board.get_line(index, row)
+				line[k] = number
+				for other in range(board.dimension):
+					if board.vector_count(other, 2, row) == 0 and \
+					   all(a == b for (a, b) in zip(line, board.get_line(other, row)) if a != 2):
+						count += 1
+			return count
+
+		if matches(1) > matches(0):
+			actions.reverse()
+
+	return actions
+
+
+BRANCHINGS = {
+    "last": last_free_position,
+    "mrv": most_constrained_position,
+    "unique": most_unique_value,
+}
+
+
+class Takuzu(Problem):
+
+	def __init__(self, board: Board, branching="last", debug=False, propagation="local"):
+		"""Constructor specifies initial state and the branching strategy
+		used when no number is forced, either a key of BRANCHINGS or a
+		function with the same signature. With "lines" propagation, every
+		line also takes the numbers forced by the valid lines matching it.
+		In debug mode every goal test is checked against the full validator."""
+		self.initial = TakuzuState(board)
+		self.branch = BRANCHINGS[branching] if isinstance(branching, str) else branching
+		self.debug = debug
+		self.line_solver = propagation == "lines"
+
+		if self.line_solver:
+			# Load the table now, raising TableTooLarge before any search.
+			patterns.table(board.dimension)
+
+	def actions(self, state: TakuzuState):
+		"""Return a collection of actions which can be executed from the given state.
+		An action is a tuple of (row, col, number) placements: either every
+		number forced by propagation, or one of the two values of a free position."""
+		board = state.board
+		if board.conflicts:
+			return []
+
+		forced = []
+		consistent = board.propagate(forced, self.line_solver)
+
+		# Propagation runs in place; the forced numbers are undone so the
+		# state is left unchanged, save for its queue of lines to examine.
+		for (row, col, number) in reversed(forced):
+			board.remove_number(row, col)
+
+		if not consistent:
+			return []
+		elif forced:
+			return [tuple(forced)]
+
+		return self.branch(board)
+
 	def result(self, state: TakuzuState, action):
 		"""Returns the state obtained from executing 'action' in 'state'."""
-		(row, col, number) = action
 		board = state.get_board()
-		board.place_number(row, col, number)
+		for (row, col, number) in action:
+			board.place_number(row, col, number)
 
 		return TakuzuState(board)
 
 	def goal_test(self, state: TakuzuState):
 		"""Return True if 'state' if a goal state."""
-		return state.board.check_resolved_board()
+		board = state.board
+		resolved = board.n_free_positions == 0 and board.conflicts == 0
+
+		if self.debug:
+			assert resolved == board.check_resolved_board()
+
+		return resolved
 
 	def h(self, node: Node):
 		"""Heuristic for A*."""
 		return node.state.board.number_free_positions()
 
 
+def trail_depth_first_solutions(problem):
+	"""Search the deepest nodes first, like depth_first_tree_search, but on a
+	single board that is mutated in place. Placements are recorded on a trail
+	and undone when backtracking, so only one board is ever kept in memory.
+	Yields every goal state, in the order depth_first_tree_search would find
+	them; the yielded state shares the board, so it changes when the search
+	resumes."""
+	state = TakuzuState(problem.initial.get_board())
+	board = state.board
+	trail = []
+
+	if problem.goal_test(state):
+		yield state
+		return
+
+	# Each entry holds the trail length when the state was expanded and the
+	# actions of that state still left to try.
+	stack = [(0, problem.actions(state))]
+
+	while stack:
+		(mark, actions) = stack[-1]
+		while len(trail) > mark:
+			board.remove_number(*trail.pop())
+		board.dirty.clear()
+
+		if not actions:
+			stack.pop()
+			continue
+
+		for (row, col, number) in actions.pop():
+			board.place_number(row, col, number)
+			trail.append((row, col))
+
+		if problem.goal_test(state):
+			yield state
+		else:
+			stack.append((len(trail), problem.actions(state)))
+
+
+def trail_depth_first_search(problem):
+	"""Return a Node holding the first goal state found by
+	trail_depth_first_solutions, or None."""
+	state = next(trail_depth_first_solutions(problem), None)
+	return Node(state) if state is not None else None
+
+
+def solutions(board: Board, branching="last", limit=None, propagation="local"):
+	"""Yield a copy of every solved board of board, stopping after limit
+	solutions if given. Checking that a board has a unique solution thus
+	costs at most the search for two solutions."""
+	problem = Takuzu(board, branching, propagation=propagation)
+	for (k, state) in enumerate(trail_depth_first_solutions(problem)):
+		if k == limit:
+			return
+		yield state.board.copy()
+
+
+def count_solutions(board: Board, branching="last", limit=None, propagation="local"):
+	"""Return the number of solutions of board, counting at most limit."""
+	return sum(1 for _ in solutions(board, branching, limit, propagation))
+
+
+def parallel_worker(problem, tasks, results, counters, done):
+	"""Run depth-first search on the subtrees taken from tasks, giving the
+	oldest pending subtree of its stack back to tasks whenever more workers
+	are idle than there are subtrees waiting. Puts the serialized solution on
+	results, or None once every subtree has been searched without one."""
+	(idle, waiting, outstanding) = counters
+
+	while not done.is_set():
+		try:
+			data = tasks.get(timeout=0.05)
+		except Empty:
+			continue
+
+		with idle.get_lock():
+			idle.value -= 1
+		with waiting.get_lock():
+			waiting.value -= 1
+
+		stack = [Node(TakuzuState(type(problem.initial.board).deserialize(data)))]
+
+		while stack and not done.is_set():
+			if len(stack) > 1 and idle.value > waiting.value:
+				with outstanding.get_lock():
+					outstanding.value += 1
+				with waiting.get_lock():
+					waiting.value += 1
+				tasks.put(stack.pop(0).state.board.serialize())
+
+			node = stack.pop()
+			if problem.goal_test(node.state):
+				results.put(node.state.board.serialize())
+				done.set()
+				break
+
+			stack.extend(node.expand(problem))
+
+		with idle.get_lock():
+			idle.value += 1
+		with outstanding.get_lock():
+			outstanding.value -= 1
+			# A worker stopped by done leaves its subtree unsearched, so
+			# None is only put when every subtree was searched without a goal.
+			if outstanding.value == 0 and not done.is_set():
+				results.put(None)
+				done.set()
+
+
+def parallel_depth_first_search(problem, jobs=None):
+	"""Search the deepest nodes first over jobs worker processes (by default
+	one per CPU). The search tree is split at its branching points: workers
+	run depth-first search on their own subtree, and idle workers steal the
+	oldest pending subtrees of the busy ones. Every worker stops as soon as
+	one of them finds a goal. Returns a Node holding the solved state, or None.
+	Raises RuntimeError if a worker exits before any result, as the subtrees
+	it held would never be searched."""
+	jobs = jobs or os.cpu_count()
+	tasks = multiprocessing.Queue()
+	results = multiprocessing.Queue()
+	done = multiprocessing.Event()
+	# Idle workers, subtrees waiting in tasks, and subtrees not yet searched.
+	counters = (multiprocessing.Value("i", jobs), multiprocessing.Value("i", 1),
+	            multiprocessing.Value("i", 1))
+
+	tasks.put(problem.initial.board.serialize())
+	processes = [multiprocessing.Process(target=parallel_worker,
+	                                     args=(problem, tasks, results, counters, done),
+	                                     daemon=True)
+	             for _ in range(jobs)]
+
+	for process in processes:
+		process.start()
+
+	try:
+		while True:
+			try:
+				solution = results.get(timeout=0.1)
+				break
+			except Empty:
+				# Workers only return once done is set, by the one putting a result.
+				if not done.is_set() and not all(process.is_alive() for process in processes):
+					raise RuntimeError("A worker of the parallel search exited with code {}."
+					                   .format(next(process.exitcode for process in processes
+					                                if not process.is_alive())))
+	finally:
+		done.set()
+		for process in processes:
+			process.terminate()
+		for process in processes:
+			process.join()
+
+	if solution is None:
+		return None
+
+	return Node(TakuzuState(type(problem.initial.board).deserialize(solution)))
+
+
+def sat_search(problem):
+	"""Solve the instance with the CDCL solver of sat.py on its CNF encoding.
+	Returns a Node holding the solved state, or None."""
+	board = problem.initial.board
+	rows = sat.solve_board(board)
+	return Node(TakuzuState(type(board)(rows))) if rows is not None else None
+
+
+def row_pattern_search(problem):
+	"""Solve the instance with the row-pattern search of rows.py, which picks
+	whole valid rows instead of single numbers, once the numbers forced by
+	the initial board, line solver included, are placed. Returns a Node
+	holding the solved state, or None."""
+	board = problem.initial.board.copy()
+	patterns.table(board.dimension)
+	if not board.propagate([], lines=True):
+		return None
+
+	solution = rows.solve_board(board)
+	return Node(TakuzuState(type(board)(solution))) if solution is not None else None
+
+
+SEARCHES = {
+    "dfs": depth_first_tree_search,
+    "bfs": breadth_first_tree_search,
+    "dfs-graph": depth_first_graph_search,
+    "bfs-graph": breadth_first_graph_search,
+    "greedy": greedy_search,
+    "astar": astar_search,
+    "trail": trail_depth_first_search,
+    "parallel": parallel_depth_first_search,
+    "sat": sat_search,
+    "rows": row_pattern_search,
+}
+
+
+def solve(board: Board, search="dfs", branching="last", debug=False, jobs=None,
+          propagation="local", cache=None, cache_size=CAPACITY):
+	"""Solve board and return the solved board, or None if it has no solution.
+	jobs is the number of worker processes of the parallel search. cache is
+	the path of a SolutionCache consulted before searching, holding at most
+	cache_size solutions."""
+	if cache is not None:
+		(hit, solution) = open_cache(cache, cache_size).get(board)
+		if hit:
+			return type(board).deserialize(solution) if solution is not None else None
+
+	problem = Takuzu(board, branching, debug, propagation)
+
+	if search == "parallel":
+		node = parallel_depth_first_search(problem, jobs)
+	else:
+		node = SEARCHES[search](problem)
+
+	solution = node.state.board if node else None
+
+	if cache is not None:
+		open_cache(cache, cache_size).put(board, solution.serialize() if solution is not None else None)
+
+	return solution
+
+
+def solve_batch(boards, **options):
+	"""Solve, one after another, every board of an iterable. Yields the
+	solved board (None if it has no solution) and the seconds spent solving
+	each instance."""
+	for board in boards:
+		start = time.perf_counter()
+		solution = solve(board, **options)
+		yield (solution, time.perf_counter() - start)
+
+
+def format_solution(solution):
+	"""Return the output of the solver for a solved board, or None."""
+	return str(solution) if solution is not None else "No solution"
+
+
+def read_instances(path):
+	"""Yield the numbers of every instance in path, a file or a directory of
+	.in files, as square np.uint8 arrays. Files are converted a chunk at a
+	time by parse_stream, while - (stdin) is read one instance at a time, so
+	that each instance is solved as soon as it arrives."""
+	if path == "-":
+		rows = Board.read_rows(sys.stdin)
+		while rows is not None:
+			yield rows.astype(np.uint8)
+			rows = Board.read_rows(sys.stdin)
+		return
+
+	if os.path.isdir(path):
+		paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+		               if name.endswith(".in"))
+	else:
+		paths = [path]
+
+	for name in paths:
+		with open(name, "rb") as f:
+			yield from parse_stream(f)
+
+
+def solve_serialized(data, board="array", **options):
+	"""Solve a serialized instance; return the solver output and the seconds
+	spent solving it. Run by the worker processes of solve_parallel."""
+	start = time.perf_counter()
+	solution = solve(BOARDS[board].deserialize(data), **options)
+	return (format_solution(solution), time.perf_counter() - start)
+
+
+def solve_parallel(instances, jobs, board="array", window=None, **options):
+	"""Solve serialized instances over a pool of jobs worker processes.
+	Yields the solver output and the seconds spent on each instance, in input
+	order. At most window instances (by default 4 per worker) are read ahead
+	of the one being yielded, so memory does not grow with the input."""
+	window = window or 4 * jobs
+	pending = deque()
+
+	with multiprocessing.Pool(jobs) as pool:
+		for data in instances:
+			if len(pending) == window:
+				yield pending.popleft().get()
+			pending.append(pool.apply_async(solve_serialized, (data, board), options))
+
+		while pending:
+			yield pending.popleft().get()
+
+
+PORTFOLIO = [
+    ("dfs", "last"),
+    ("dfs", "mrv"),
+    ("trail", "unique"),
+    ("greedy", "last"),
+    ("astar", "mrv"),
+    ("bfs", "last"),
+]
+
+
+# Searches that explore every branch before reporting that there is no solution.
+COMPLETE_SEARCHES = ("dfs", "trail")
+
+
+def portfolio_worker(queue, board, search, branching, options):
+	"""Solve board with one strategy of a portfolio and put on queue the
+	strategy, the serialized solution (None if there is none) and the error
+	raised by the search (None if it finished)."""
+	try:
+		solution = solve(board, search, branching, **options)
+		queue.put((search, branching, solution.serialize() if solution else None, None))
+	except Exception as error:
+		queue.put((search, branching, None, "{}: {}".format(type(error).__name__, error)))
+
+
+def solve_portfolio(board: Board, strategies=PORTFOLIO, **options):
+	"""Race the (search, branching) strategies on board, each in its own
+	process, with the other options of solve. Returns the first solution
+	found, as a board of the same class, the strategy that decided (the one
+	that found the solution, or a complete search that found none) and the
+	errors of the strategies that failed. The remaining processes are
+	terminated as soon as one strategy decides. Raises RuntimeError if the
+	strategies that finished do not decide."""
+	queue = multiprocessing.Queue()
+	processes = [multiprocessing.Process(target=portfolio_worker,
+	                                     args=(queue, board, search, branching, options),
+	                                     daemon=True)
+	             for (search, branching) in strategies]
+	errors = []
+
+	for process in processes:
+		process.start()
+
+	try:
+		pending = len(processes)
+		while pending:
+			try:
+				(search, branching, solution, error) = queue.get(timeout=0.1)
+			except Empty:
+				if not any(process.is_alive() for process in processes) and queue.empty():
+					errors.append("{} strategies exited without an answer".format(pending))
+					break
+				continue
+
+			pending -= 1
+			if error is not None:
+				errors.append("{} with {} branching: {}".format(search, branching, error))
+			elif solution is not None:
+				return (type(board).deserialize(solution), (search, branching), errors)
+			elif search in COMPLETE_SEARCHES:
+				return (None, (search, branching), errors)
+
+		if errors:
+			raise RuntimeError("; ".join(errors))
+
+		return (None, None, errors)
+	finally:
+		for process in processes:
+			process.terminate()
+		for process in processes:
+			process.join()
+
+
+class DeadlineExceeded(Exception):
+	"""Raised in a server worker when the deadline of its request passes."""
+
+
+def raise_deadline_exceeded(signum, frame):
+	raise DeadlineExceeded()
+
+
+def init_server_worker():
+	"""Prepare a worker process of serve: SIGALRM interrupts the request
+	being solved, and SIGINT is left to the server process."""
+	signal.signal(signal.SIGALRM, raise_deadline_exceeded)
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def solve_request(data, board="array", expires=None, **options):
+	"""Solve a serialized instance in a worker process of serve, and return
+	the solver output, or an error if the deadline expires (a time.time()
+	value) before the solution is found."""
+	if expires is not None:
+		remaining = expires - time.time()
+		if remaining <= 0:
+			return "Error: deadline exceeded"
+		signal.setitimer(signal.ITIMER_REAL, remaining)
+
+	try:
+		return format_solution(solve(BOARDS[board].deserialize(data), **options))
+	except DeadlineExceeded:
+		return "Error: deadline exceeded"
+	finally:
+		signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def serve(path, jobs=None, queue=None, deadline=None, board="array", **options):
+	"""Serve solutions on the Unix socket path until interrupted. A request
+	is an instance in the input format, optionally preceded by a line
+	"deadline SECONDS", and is answered with the output of the solver. The
+	instances are solved by a pool of jobs worker processes (by default one
+	per CPU); beyond queue requests being solved or waiting (by default 4
+	per worker), a request is answered at once with an error. Requests
+	without a deadline of their own get the given one, if any."""
+	jobs = jobs or os.cpu_count()
+	slots = threading.BoundedSemaphore(queue or 4 * jobs)
+	pool = multiprocessing.Pool(jobs, initializer=init_server_worker)
+
+	class Handler(socketserver.StreamRequestHandler):
+
+		def handle(self):
+			self.wfile.write((self.answer(self.rfile.read().decode()) + "\n").encode())
+
+		def answer(self, request):
+			expires = time.time() + deadline if deadline is not None else None
+
+			try:
+				if request.startswith("deadline"):
+					(header, _, request) = request.partition("\n")
+					expires = time.time() + float(header.split()[1])
+				numbers = next(parse_instances(request), None)
+			except (ValueError, IndexError):
+				numbers = None
+
+			if numbers is None:
+				return "Error: malformed request"
+
+			if not slots.acquire(blocking=False):
+				return "Error: server busy"
+			try:
+				result = pool.apply_async(solve_request, (numbers.tobytes(), board, expires), options)
+				return result.get(timeout=max(0, expires - time.time()) if expires is not None else None)
+			except multiprocessing.TimeoutError:
+				return "Error: deadline exceeded"
+			except Exception as error:
+				return "Error: {}: {}".format(type(error).__name__, error)
+			finally:
+				slots.release()
+
+	if os.path.exists(path):
+		os.unlink(path)
+
+	server = socketserver.ThreadingUnixStreamServer(path, Handler)
+	server.daemon_threads = True
+
+	try:
+		server.serve_forever()
+	finally:
+		server.server_close()
+		pool.terminate()
+		os.unlink(path)
+
+
+def request(path, numbers, deadline=None):
+	"""Send the instance given by a square array of numbers to the server on
+	the Unix socket path, and return its answer, or an error if the server
+	closes the connection without one."""
+	text = "{}\n{}\n".format(len(numbers), format_numbers(numbers))
+	if deadline is not None:
+		text = "deadline {}\n{}".format(deadline, text)
+
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+		connection.connect(path)
+		connection.sendall(text.encode())
+		connection.shutdown(socket.SHUT_WR)
+		with connection.makefile("rb") as answer:
+			return answer.read().decode().rstrip("\n") or "Error: no answer from the server"
+
+
 if __name__ == "__main__":
-	board = Board.parse_instance_from_stdin()
+	parser = argparse.ArgumentParser(description="Solve a Takuzu instance read from stdin.")
+	parser.add_argument("-b", "--board", choices=BOARDS, default="array",
+	                    help="board representation (default: array)")
+	parser.add_argument("-s", "--search", choices=SEARCHES, default="dfs",
+	                    help="search algorithm (default: dfs)")
+	parser.add_argument("-r", "--branching", choices=BRANCHINGS, default="last",
+	                    help="branching strategy when no number is forced (default: last)")
+	parser.add_argument("--propagation", choices=("local", "lines"), default="local",
+	                    help="lines also forces the numbers on which every valid line "
+	                         "matching a row or column agrees (default: local)")
+	parser.add_argument("-d", "--debug", action="store_true",
+	                    help="check every goal test against the full validator")
+	parser.add_argument("--batch", nargs="?", const="-", metavar="PATH",
+	                    help="solve every instance of a stream of concatenated instances "
+	                    "read from PATH (a file, a directory of .in files or - for stdin), "
+	                    "reporting the time spent on each one to stderr")
+	parser.add_argument("-j", "--jobs", type=int,
+	                    help="worker processes used by --batch (default: 1) "
+	                    "and by the parallel search (default: one per CPU)")
+	parser.add_argument("-p", "--portfolio", action="store_true",
+	                    help="race several search algorithms and branching strategies "
+	                    "in parallel, reporting the fastest one to stderr")
+	parser.add_argument("--all", action="store_true",
+	                    help="print every solution, separated by empty lines")
+	parser.add_argument("--count", action="store_true",
+	                    help="print the number of solutions")
+	parser.add_argument("--limit", type=int,
+	                    help="stop --all and --count after this many solutions")
+	parser.add_argument("--dimacs", metavar="PATH",
+	                    help="write the CNF encoding of the instance to PATH in DIMACS format")
+	parser.add_argument("--serve", metavar="SOCKET",
+	                    help="keep the solver running, answering instances sent to the Unix "
+	                    "socket SOCKET with a pool of --jobs workers (default: one per CPU)")
+	parser.add_argument("--queue", type=int,
+	                    help="requests --serve accepts at once before answering that it is "
+	                    "busy (default: 4 per worker)")
+	parser.add_argument("--connect", metavar="SOCKET",
+	                    help="send the instances read from stdin (or --batch PATH) to the "
+	                    "server on the Unix socket SOCKET and print its answers")
+	parser.add_argument("--deadline", type=float, metavar="SECONDS",
+	                    help="give up on an instance of --serve or --connect after SECONDS")
+	parser.add_argument("--cache", metavar="PATH",
+	                    help="look up and store solutions in the SQLite database PATH")
+	parser.add_argument("--cache-size", type=int, default=CAPACITY,
+	                    help="number of solutions kept in the cache (default: %(default)s)")
+	args = parser.parse_args()
+	options = {"search": args.search, "branching": args.branching, "debug": args.debug,
+	           "propagation": args.propagation}
+	if args.search == "parallel":
+		options["jobs"] = args.jobs
+	if args.cache is not None:
+		options["cache"] = args.cache
+		options["cache_size"] = args.cache_size
+
+	if args.portfolio and args.batch is not None:
+		parser.error("--portfolio solves a single instance and cannot be used with --batch")
+
+	if (args.all or args.count) and (args.batch is not None or args.serve is not None or
+	                                 args.connect is not None or args.portfolio or args.dimacs):
+		parser.error("--all and --count enumerate the solutions of a single instance")
+
+	if (args.all or args.count) and args.search != parser.get_default("search"):
+		parser.error("--all and --count enumerate solutions with depth-first search "
+		             "and cannot be used with --search")
+
+	if args.serve is not None and (args.search == "parallel" or args.portfolio):
+		parser.error("--serve solves each instance in a single worker process")
+
+	try:
+		if args.serve is not None:
+			try:
+				serve(args.serve, args.jobs, args.queue, args.deadline, args.board, **options)
+			except KeyboardInterrupt:
+				pass
+		elif args.connect is not None:
+			failed = False
+			for numbers in read_instances(args.batch or "-"):
+				answer = request(args.connect, numbers, args.deadline)
+				failed |= answer.startswith("Error:")
+				print(answer, file=sys.stderr if answer.startswith("Error:") else sys.stdout, flush=True)
+			if failed:
+				sys.exit(1)
+		elif args.batch is not None:
+			instances = PackFile(args.batch) if is_packfile(args.batch) else read_instances(args.batch)
+
+			if args.jobs is not None and args.jobs > 1 and args.search != "parallel":
+				results = solve_parallel((numbers.tobytes() for numbers in instances),
+				                         args.jobs, args.board, **options)
+			else:
+				boards = (BOARDS[args.board](numbers) for numbers in instances)
+				results = ((format_solution(solution), seconds) for (solution, seconds) in
+				           solve_batch(boards, **options))
+
+			for (k, (output, seconds)) in enumerate(results, 1):
+				print(output, flush=True)
+				print("{}: {:.1f} ms".format(k, seconds * 1000), file=sys.stderr)
+		elif args.dimacs:
+			board = BOARDS[args.board].parse_instance_from_stdin()
+			with open(args.dimacs, "w") as f:
+				f.write(sat.encode(board).to_dimacs())
+			print(format_solution(solve(board, **options)))
+		elif args.all or args.count:
+			board = BOARDS[args.board].parse_instance_from_stdin()
+			k = 0
+			for (k, solution) in enumerate(solutions(board, args.branching, args.limit, args.propagation), 1):
+				if args.all:
+					print(("\n" if k > 1 else "") + str(solution), flush=True)
+			if args.count:
+				print(k)
+		elif args.portfolio:
+			board = BOARDS[args.board].parse_instance_from_stdin()
+			strategy_options = {k: v for (k, v) in options.items() if k not in ("search", "branching")}
+			try:
+				(solution, strategy, errors) = solve_portfolio(board, **strategy_options)
+			except RuntimeError as error:
+				print("Error: {}".format(error), file=sys.stderr)
+				sys.exit(1)
+			for error in errors:
+				print("Error: {}".format(error), file=sys.stderr)
+			print(format_solution(solution))
+			if strategy is not None:
+				print("{} with {} branching".format(*strategy), file=sys.stderr)
+		else:
+			board = BOARDS[args.board].parse_instance_from_stdin()
+			print(format_solution(solve(board, **options)))
+	except (patterns.TableTooLarge, RuntimeError) as error:
+		print("Error: {}".format(error), file=sys.stderr)
+		sys.exit(1)
 
-	node = depth_first_tree_search(Takuzu(board))
-	print(node.state.board)
+	if args.cache is not None:
+		print("cache: {} hits, {} misses, {} solutions".format(
+		    *open_cache(args.cache, args.cache_size).stats()), file=sys.stderr)
@@ -4,7 +4,6 @@ import bisect
 import collections
 import collections.abc
 import functools
-import heapq
 import operator
 import os.path
 import random
@@ -739,10 +738,15 @@ class PriorityQueue:
     order) is returned first.
     If order is 'min', the item with minimum f(x) is
     returned first; if order is 'max', then it is the item with maximum f(x).
-    Also supports dict-like lookup."""
+    Also supports dict-like lookup.
+    The heap is indexed by a dict from each item to its slot, so membership
+    is O(1) and removal and decrease-key are O(log n). Items must be hashable
+    and equal items are kept only once: appending an item equal to one
+    already in the queue replaces it."""
 
 	def __init__(self, order='min', f=lambda x: x):
 		self.heap = []
+		self.index = {}
 		if order == 'min':
 			self.f = f
 		elif order == 'max':  # now item with max f(x)
@@ -752,7 +756,12 @@ class PriorityQueue:
 
 	def append(self, item):
 		"""Insert item at its correct position."""
-		heapq.heappush(self.heap, (self.f(item), item))
+		if item in self.index:
+			self.decrease_key(item)
+		else:
+			self.heap.append((self.f(item), item))
+			self.index[item] = len(self.heap) - 1
+			self._sift_up(len(self.heap) - 1)
 
 	def extend(self, items):
 		"""Insert each item in items at its correct position."""
@@ -763,33 +772,85 @@ class PriorityQueue:
 		"""Pop and return the item (with min or max f(x) value)
         depending on the order."""
 		if self.heap:
-			return heapq.heappop(self.heap)[1]
+			return self._remove(0)[1]
 		else:
 			raise Exception('Trying to pop from empty PriorityQueue.')
 
+	def decrease_key(self, item):
+		"""Replace the item equal to item with it, moving it to the position
+        given by its new f(x) value."""
+		try:
+			i = self.index.pop(item)
+		except KeyError:
+			raise KeyError(str(item) + " is not in the priority queue")
+		self.heap[i] = (self.f(item), item)
+		self.index[item] = i
+		self._sift_down(self._sift_up(i))
+
 	def __len__(self):
 		"""Return current capacity of PriorityQueue."""
 		return len(self.heap)
 
 	def __contains__(self, key):
 		"""Return True if the key is in PriorityQueue."""
-		return any([item == key for _, item in self.heap])
+		return key in self.index
 
 	def __getitem__(self, key):
-		"""Returns the first value associated with key in PriorityQueue.
+		"""Returns the value associated with key in PriorityQueue.
         Raises KeyError if key is not present."""
-		for value, item in self.heap:
-			if item == key:
-				return value
-		raise KeyError(str(key) + " is not in the priority queue")
+		try:
+			return self.heap[self.index[key]][0]
+		except KeyError:
+			raise KeyError(str(key) + " is not in the priority queue")
 
 	def __delitem__(self, key):
-		"""Delete the first occurrence of key."""
+		"""Delete the occurrence of key."""
 		try:
-			del self.heap[[item == key for _, item in self.heap].index(True)]
-		except ValueError:
+			i = self.index[key]
+		except KeyError:
 			raise KeyError(str(key) + " is not in the priority queue")
-		heapq.heapify(self.heap)
+		self._remove(i)
+
+	def _remove(self, i):
+		"""Remove and return the (f(x), x) entry in slot i of the heap."""
+		entry = self.heap[i]
+		last = self.heap.pop()
+		del self.index[entry[1]]
+		if i < len(self.heap):
+			self.heap[i] = last
+			self.index[last[1]] = i
+			self._sift_down(self._sift_up(i))
+		return entry
+
+	def _sift_up(self, i):
+		"""Move the entry in slot i towards the root; return its final slot."""
+		entry = self.heap[i]
+		while i > 0:
+			parent = (i - 1) // 2
+			if not entry < self.heap[parent]:
+				break
+			self.heap[i] = self.heap[parent]
+			self.index[self.heap[i][1]] = i
+			i = parent
+		self.heap[i] = entry
+		self.index[entry[1]] = i
+		return i
+
+	def _sift_down(self, i):
+		"""Move the entry in slot i towards the leaves; return its final slot."""
+		entry = self.heap[i]
+		while 2 * i + 1 < len(self.heap):
+			child = 2 * i + 1
+			if child + 1 < len(self.heap) and self.heap[child + 1] < self.heap[child]:
+				child += 1
+			if not self.heap[child] < entry:
+				break
+			self.heap[i] = self.heap[child]
+			self.index[self.heap[i][1]] = i
+			i = child
+		self.heap[i] = entry
+		self.index[entry[1]] = i
+		return i
 
 
 # ______________________________________________________________________________